@@ -85,8 +85,10 @@ def _save_state():
         seen_list = list(_seen_hashes)
         if len(seen_list) > 20000:
             seen_list = seen_list[-20000:]
-        with open(STATE_FILE, "w", encoding="utf-8") as f:
+        tmp = STATE_FILE + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
             json.dump({"seen": seen_list}, f)
+        os.replace(tmp, STATE_FILE)
     except Exception:
         pass
 
@@ -191,9 +191,14 @@ async def on_ready():
 @client.event
 async def on_message(message: discord.Message):
     """
-    Crosschat relay only.
+    Crosschat relay + traveler log image uploads.
     (Traveler log channel restriction is handled via Discord permissions.)
     """
+    try:
+        await travelerlogs_module.enforce_travelerlog_lock(message)
+    except Exception as e:
+        print(f"[travelerlogs] on_message error: {e}")
+
     rcon_cmd = _get_rcon_command()
     if rcon_cmd is not None:
         try:
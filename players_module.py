@@ -58,8 +58,10 @@ def _load_state():
 def _save_state(state: dict):
     try:
         _ensure_data_dir()
-        with open(STATE_PATH, "w", encoding="utf-8") as f:
+        tmp = STATE_PATH + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
             json.dump(state, f)
+        os.replace(tmp, STATE_PATH)
     except Exception:
         pass
 
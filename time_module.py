@@ -152,8 +152,10 @@ def _save_state():
             "last_timed_line_fingerprint": _last_timed_line_fingerprint,
             "last_announced_day": _last_announced_day,
         }
-        with open(STATE_FILE, "w", encoding="utf-8") as f:
+        tmp = STATE_FILE + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
             json.dump(payload, f)
+        os.replace(tmp, STATE_FILE)
     except Exception as e:
         if SHOW_DEBUG:
             print("[time_module] save_state error:", e)
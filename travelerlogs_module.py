@@ -16,10 +16,14 @@
 # - Embeds: description max 4096. Field values max 1024. This module uses DESCRIPTION for long log text.
 
 import os
+import re
+import json
+import time
 import asyncio
 import discord
 from discord import app_commands
-from typing import Optional, Dict, Any, Tuple, List, Set
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple, List, FrozenSet
 
 import time_module
 
@@ -35,16 +39,19 @@ LOG_EMBED_COLOR = 0x1F5FBF    # blue-ish
 PANEL_TITLE = "🖋️ Write a Traveler Log"
 LOG_TITLE = "📜 Traveler Log"
 
+# Persistent button IDs (the Write Log button also marks a message as a panel)
+WRITE_BUTTON_CUSTOM_ID = "travelerlogs:write"
+
 # Category-wide mode: put the panel in every channel in this category
 TRAVELERLOGS_CATEGORY_ID = int(os.getenv("TRAVELERLOGS_CATEGORY_ID", "1434615650890023133"))
 
 # Exclusions (channels inside category that should NOT get a panel)
-EXCLUDED_CHANNEL_IDS: Set[int] = {
+EXCLUDED_CHANNEL_IDS: FrozenSet[int] = frozenset({
     1462539723112321218,
     1437457789164191939,
     1455315150859927663,
     1456386974167466106,
-}
+})
 
 # Admin role allowed to use /postlogbutton
 ADMIN_ROLE_ID = int(os.getenv("TRAVELERLOGS_ADMIN_ROLE_ID", "1439069787207766076"))
@@ -52,25 +59,182 @@ ADMIN_ROLE_ID = int(os.getenv("TRAVELERLOGS_ADMIN_ROLE_ID", "1439069787207766076
 # Image policy (reliable: 1)
 MAX_IMAGES_PER_LOG = 1
 
+# Memory cap on an image we buffer and re-upload (bytes). The effective limit is
+# the lower of this and the guild's upload limit, which the re-upload must fit.
+MAX_IMAGE_BYTES = int(os.getenv("TRAVELERLOGS_MAX_IMAGE_BYTES", str(100 * 1024 * 1024)))
+
+# Discord caps: 4096-char embed description; per message up to 10 embeds,
+# 6000 characters across all of them
+EMBED_DESCRIPTION_LIMIT = 4096
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+
+# How long a Write/Edit modal stays open
+MODAL_TIMEOUT_SECONDS = 300
+
 # Temporary upload window (seconds) - configurable
 TEMP_UPLOAD_SECONDS = int(os.getenv("TRAVELERLOGS_UPLOAD_SECONDS", "60"))
 
-# How many recent messages we scan to find/delete old panels
-PANEL_SCAN_LIMIT = int(os.getenv("TRAVELERLOGS_PANEL_SCAN_LIMIT", "50"))
+# How many recent messages we scan to find/delete old panels.
+# Only used when no panel ID is cached (e.g. after a restart); the panel is
+# reposted after every log so it is almost always among the last few messages.
+PANEL_SCAN_LIMIT = int(os.getenv("TRAVELERLOGS_PANEL_SCAN_LIMIT", "10"))
 
 # Rate-limit safety when ensuring panels across many channels (seconds)
 ENSURE_PANEL_DELAY_SECONDS = float(os.getenv("TRAVELERLOGS_ENSURE_PANEL_DELAY", "2.5"))
 
+# How many channels are ensured at the same time on startup
+ENSURE_PANEL_CONCURRENCY = int(os.getenv("TRAVELERLOGS_ENSURE_PANEL_CONCURRENCY", "5"))
+
+# How long a Year/Day lookup from time_module is reused (seconds)
+TIME_CACHE_SECONDS = float(os.getenv("TRAVELERLOGS_TIME_CACHE_SECONDS", "30"))
+
+# Max logs whose full text (up to 4000 chars each) is cached for Edit/Add Image;
+# anything not cached is parsed back from the embed
+LOG_CONTENT_CACHE_MAX = int(os.getenv("TRAVELERLOGS_LOG_CONTENT_CACHE_MAX", "200"))
+
+# Persist panel message IDs so restarts can skip the history scan
+DATA_DIR = os.getenv("TRAVELERLOGS_DATA_DIR", "/data")
+STATE_FILE = os.getenv("TRAVELERLOGS_STATE_FILE", os.path.join(DATA_DIR, "travelerlogs_state.json"))
+
+# Persist log ownership so Edit/Add Image keep working across restarts.
+# Written off the event loop, at most once per OWNERS_SAVE_DELAY_SECONDS burst.
+OWNERS_FILE = os.getenv("TRAVELERLOGS_OWNERS_FILE", os.path.join(DATA_DIR, "travelerlogs_owners.json"))
+OWNERS_SAVE_DELAY_SECONDS = float(os.getenv("TRAVELERLOGS_OWNERS_SAVE_DELAY", "2"))
+
 # =====================
 # IN-MEMORY STATE
 # =====================
 
-# log message id -> {"author_id": int, "image_filename": str|None}
-_LOG_META: Dict[int, Dict[str, Any]] = {}
-
-# Quick cache: channel_id -> last panel message id (best effort)
+class _LRUDict(OrderedDict):
+    """
+    Dict capped at maxsize entries: writes and get() refresh an entry,
+    the least recently used one is dropped on overflow.
+    """
+    def __init__(self, maxsize: int):
+        super().__init__()
+        self.maxsize = max(1, maxsize)
+
+    def get(self, key, default=None):
+        if key in self:
+            self.move_to_end(key)
+            return super().__getitem__(key)
+        return default
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > self.maxsize:
+            self.popitem(last=False)
+
+# log message id -> (author_id, image_filename). Durable (OWNERS_FILE) and never
+# evicted: losing an entry would lock the author out of their own log.
+_LOG_OWNERS: Dict[int, Tuple[int, Optional[str]]] = {}
+
+# log message id -> (year, day, location, title, body) as last written/edited.
+# Only a cache (bodies are large); misses are parsed back from the embed.
+_LOG_CONTENT: Dict[int, Tuple[int, int, str, str, str]] = _LRUDict(LOG_CONTENT_CACHE_MAX)
+
+# channel_id -> last panel message id (persisted in STATE_FILE)
 _LAST_PANEL_ID: Dict[int, int] = {}
 
+# channel_id -> lock around panel delete+repost
+_PANEL_LOCKS: Dict[int, asyncio.Lock] = {}
+
+# Open image upload windows: (channel_id, user_id) -> future resolved with the upload message
+_PENDING_UPLOADS: Dict[Tuple[int, int], asyncio.Future] = {}
+
+# Last Year/Day lookup: (monotonic ts, year, day)
+_TIME_CACHE: Tuple[float, int, int] = (0.0, 1, 1)
+
+# Debounced OWNERS_FILE writer
+_OWNERS_DIRTY = False
+_OWNERS_SAVE_TASK: Optional[asyncio.Task] = None
+
+# =====================
+# FILE IO
+# =====================
+
+def _ensure_dir(path: str):
+    d = os.path.dirname(path)
+    if d and not os.path.exists(d):
+        os.makedirs(d, exist_ok=True)
+
+def _load_state():
+    try:
+        if not os.path.exists(STATE_FILE):
+            return
+        with open(STATE_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            return
+
+        panels = data.get("panels", {})
+        if isinstance(panels, dict):
+            for cid, mid in panels.items():
+                _LAST_PANEL_ID[int(cid)] = int(mid)
+    except Exception as e:
+        print(f"[travelerlogs] load_state error: {e}")
+
+def _save_state():
+    try:
+        _ensure_dir(STATE_FILE)
+        payload = {
+            "panels": {str(cid): mid for cid, mid in _LAST_PANEL_ID.items()},
+        }
+        tmp = STATE_FILE + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp, STATE_FILE)
+    except Exception as e:
+        print(f"[travelerlogs] save_state error: {e}")
+
+def _load_owners():
+    try:
+        if not os.path.exists(OWNERS_FILE):
+            return
+        with open(OWNERS_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        logs = data.get("logs", {}) if isinstance(data, dict) else {}
+        if isinstance(logs, dict):
+            for mid, v in logs.items():
+                if isinstance(v, list) and v:
+                    _LOG_OWNERS[int(mid)] = (int(v[0]), v[1] if len(v) > 1 else None)
+    except Exception as e:
+        print(f"[travelerlogs] load_owners error: {e}")
+
+def _save_owners(snapshot: Dict[int, Tuple[int, Optional[str]]]):
+    # Runs in a worker thread; snapshot is a copy, its tuple values are immutable
+    try:
+        _ensure_dir(OWNERS_FILE)
+        tmp = OWNERS_FILE + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"logs": {str(mid): list(v) for mid, v in snapshot.items()}}, f)
+        os.replace(tmp, OWNERS_FILE)
+    except Exception as e:
+        print(f"[travelerlogs] save_owners error: {e}")
+
+async def _owners_writer():
+    global _OWNERS_DIRTY
+    # Changes made while a write is in flight set the flag again -> one more pass
+    while _OWNERS_DIRTY:
+        await asyncio.sleep(max(0.0, OWNERS_SAVE_DELAY_SECONDS))
+        _OWNERS_DIRTY = False
+        await asyncio.to_thread(_save_owners, dict(_LOG_OWNERS))
+
+def _set_log_owner(msg_id: int, author_id: int, image_filename: Optional[str] = None):
+    """
+    Record who owns a log (and its image) and schedule a background save.
+    """
+    global _OWNERS_DIRTY, _OWNERS_SAVE_TASK
+    _LOG_OWNERS[msg_id] = (author_id, image_filename)
+    _OWNERS_DIRTY = True
+    if _OWNERS_SAVE_TASK is None or _OWNERS_SAVE_TASK.done():
+        _OWNERS_SAVE_TASK = asyncio.create_task(_owners_writer())
+
+_load_state()
+_load_owners()
+
 # =====================
 # TIME HELPERS
 # =====================
@@ -79,37 +243,75 @@ def _get_current_day_year() -> Tuple[int, int]:
     """
     Pull current Year + Day from time_module.
     Falls back to 1,1 if time isn't initialised yet.
+    Reuses the last result for TIME_CACHE_SECONDS (game days change slowly).
     """
+    global _TIME_CACHE
+    now = time.monotonic()
+    ts, year, day = _TIME_CACHE
+    if ts and now - ts < TIME_CACHE_SECONDS:
+        return year, day
+
     try:
         state = time_module.get_time_state()
         year = int(state.get("year", 1))
         day = int(state.get("day", 1))
-        return year, day
     except Exception:
         return 1, 1
 
+    _TIME_CACHE = (now, year, day)
+    return year, day
+
 # =====================
 # TEXT HELPERS
 # =====================
 
+_DIGITS_RE = re.compile(r"\d+")
+
+def _parse_number_field(raw: Any, default: int = 1) -> int:
+    """
+    Year/Day modal inputs -> int (>= 1). Non-numeric input falls back to default.
+    """
+    s = str(raw or "").strip()
+    if not _DIGITS_RE.fullmatch(s):
+        return default
+    return max(1, int(s))
+
 def _chunk_text(text: str, limit: int = 3400) -> List[str]:
     """
-    Embed description hard limit 4096; keep margin for header/location/title and spacing.
+    Embed description hard limit 4096; the default keeps margin for the largest
+    header/location/title (_build_log_embeds passes the exact room left instead).
     Splits long logs into multiple pages (auto continuation).
+    Pages break just before the last newline that fits, and never end on
+    whitespace: Discord trims the end of an embed description, but whitespace
+    at the start of a page body sits mid-description and survives. So
+    "".join(pages) round-trips through the API (see _parse_log_message).
+    A single line longer than the limit is hard-split (at the last space
+    when there is one) so nothing gets truncated off the embed.
     """
     text = text or ""
-    if len(text) <= limit:
+    n = len(text)
+    if n <= limit:
         return [text]
 
     chunks: List[str] = []
-    cur = ""
-    for line in text.splitlines(keepends=True):
-        if len(cur) + len(line) > limit:
-            chunks.append(cur)
-            cur = ""
-        cur += line
-    if cur:
-        chunks.append(cur)
+    start = 0
+    while n - start > limit:
+        hard = start + limit
+        end = start
+        # Break before a newline, else before a space, else mid-word; in every
+        # case back off so trailing whitespace moves to the next page
+        for sep in ("\n", " ", None):
+            end = text.rfind(sep, start + 1, hard + 1) if sep else hard
+            while end > start and text[end - 1].isspace():
+                end -= 1
+            if end > start:
+                break
+        if end <= start:
+            end = hard  # the whole window is whitespace
+        chunks.append(text[start:end])
+        start = end
+    if start < n:
+        chunks.append(text[start:])
     return chunks
 
 def _display_name(user: discord.abc.User) -> str:
@@ -127,6 +329,22 @@ def _sanitize_location(loc: str) -> str:
         loc = loc[:120].rstrip() + "…"
     return loc
 
+def _is_log_channel(channel: Any) -> bool:
+    """
+    Traveler logs may only be written in text channels of the traveler-logs
+    category, minus the excluded ones (same set that gets a panel).
+    """
+    return (
+        isinstance(channel, discord.TextChannel)
+        and channel.category_id == TRAVELERLOGS_CATEGORY_ID
+        and channel.id not in EXCLUDED_CHANNEL_IDS
+    )
+
+def _is_image_attachment(a: discord.Attachment) -> bool:
+    # Only the 6-char prefix needs case-folding, not the whole content type
+    ct = a.content_type
+    return bool(ct) and ct[:6].lower() == "image/"
+
 # =====================
 # EMBED BUILDERS
 # =====================
@@ -140,6 +358,22 @@ def _build_panel_embed() -> discord.Embed:
     )
     return e
 
+# The panel never changes; build it once. send() only serialises the embed
+# (to_dict), it never mutates it, so the same object is safe to share.
+_PANEL_EMBED = _build_panel_embed()
+
+def _log_description_head(year: int, day: int, location: str, entry_title: str, page: int, total_pages: int) -> str:
+    """
+    Year/Day, Location and Title lines that open every log page's description.
+    """
+    header = f"**Year {year} • Day {day}**"
+    if total_pages > 1:
+        header += f"   *(Page {page}/{total_pages})*"
+
+    loc_line = f"**Location:** {(_sanitize_location(location) or 'Unknown')}"
+    title_line = f"**{(entry_title or '').strip() or 'Untitled'}**"
+    return "\n\n".join((header, loc_line, title_line))
+
 def _build_log_embed(
     *,
     year: int,
@@ -159,28 +393,77 @@ def _build_log_embed(
     # Blank
     # Body...
 
-    header = f"**Year {year} • Day {day}**"
-    if total_pages > 1:
-        header += f"   *(Page {page}/{total_pages})*"
-
-    loc_line = f"**Location:** {(_sanitize_location(location) or 'Unknown')}"
-    title_line = f"**{(entry_title or '').strip() or 'Untitled'}**"
-
-    desc_parts = [header, loc_line, title_line]
+    desc = _log_description_head(year, day, location, entry_title, page, total_pages)
     if body:
-        desc_parts.append(body)
+        desc += "\n\n" + body
+
+    # Built as a raw dict (one from_dict) instead of Embed() + setter calls;
+    # this runs once per page on every write/edit
+    d: Dict[str, Any] = {
+        "title": LOG_TITLE,
+        "description": desc[:EMBED_DESCRIPTION_LIMIT],
+        "color": LOG_EMBED_COLOR,
+        "footer": {"text": f"Logged by {author_name}"},
+    }
+    if image_filename:
+        d["image"] = {"url": f"attachment://{image_filename}"}
 
-    e = discord.Embed(
-        title=LOG_TITLE,
-        description="\n\n".join(desc_parts)[:4096],
-        color=LOG_EMBED_COLOR,
-    )
+    return discord.Embed.from_dict(d)
 
-    if image_filename:
-        e.set_image(url=f"attachment://{image_filename}")
+def _build_log_embeds(
+    *,
+    year: int,
+    day: int,
+    location: str,
+    entry_title: str,
+    body: str,
+    author_name: str,
+    image_filename: Optional[str] = None,
+) -> List[discord.Embed]:
+    """
+    All pages for one log (image goes on page 1 only).
+    Page size is whatever the 4096-char description has left after this log's
+    own header lines, so short titles/locations leave more room for the body.
+    """
+    # Size the head for a worst-case "(Page 99/99)" suffix so every page fits
+    head = _log_description_head(year, day, location, entry_title, 99, 99)
+    chunks = _chunk_text(body, limit=EMBED_DESCRIPTION_LIMIT - len(head) - 2)
+    total = len(chunks)
+    return [
+        _build_log_embed(
+            year=year,
+            day=day,
+            location=location,
+            entry_title=entry_title,
+            body=chunk,
+            author_name=author_name,
+            image_filename=image_filename if i == 1 else None,
+            page=i,
+            total_pages=total,
+        )
+        for i, chunk in enumerate(chunks, start=1)
+    ]
 
-    e.set_footer(text=f"Logged by {author_name}")
-    return e
+def _batch_embeds(embeds: List[discord.Embed]) -> List[List[discord.Embed]]:
+    """
+    Groups pages into as few messages as Discord allows (10 embeds / 6000 chars each).
+    With the modal caps (4000-char body) a log always fits in one message.
+    """
+    batches: List[List[discord.Embed]] = []
+    cur: List[discord.Embed] = []
+    size = 0
+    for e in embeds:
+        n = len(e)
+        if cur and (len(cur) >= MAX_EMBEDS_PER_MESSAGE or size + n > MAX_EMBED_CHARS_PER_MESSAGE):
+            batches.append(cur)
+            cur, size = [], 0
+        cur.append(e)
+        size += n
+    if cur:
+        batches.append(cur)
+    return batches
+
+_YEAR_DAY_RE = re.compile(r"Year\s+(\d+)\D*?Day\s+(\d+)")
 
 def _parse_log_embed_description(desc: str) -> Tuple[int, int, str, str, str]:
     """
@@ -198,15 +481,9 @@ def _parse_log_embed_description(desc: str) -> Tuple[int, int, str, str, str]:
     lines = desc.splitlines()
 
     # First line: **Year X • Day Y**   *(Page a/b)*
-    try:
-        first = lines[0].replace("*", "")
-        tokens = first.replace("•", "").split()
-        # tokens like: ['Year','2','Day','336','(Page','1/2)'] (page bits may exist)
-        if "Year" in tokens and "Day" in tokens:
-            year = int(tokens[tokens.index("Year") + 1])
-            day = int(tokens[tokens.index("Day") + 1])
-    except Exception:
-        pass
+    m = _YEAR_DAY_RE.search(lines[0])
+    if m:
+        year, day = int(m.group(1)), int(m.group(2))
 
     # Find "Location:" line and Title line
     # Because we add blank lines between sections, lines may include empty strings.
@@ -267,53 +544,104 @@ def _parse_log_embed_description(desc: str) -> Tuple[int, int, str, str, str]:
 
     return year, day, location, title, body
 
+def _page_body(desc: str) -> str:
+    """
+    Raw body of one page: everything after the header/location/title lines,
+    which _build_log_embed always joins with blank lines. Not stripped.
+    """
+    parts = (desc or "").split("\n\n", 3)
+    return parts[3] if len(parts) == 4 else ""
+
+def _parse_log_message(msg: discord.Message) -> Tuple[int, int, str, str, str]:
+    """
+    Like _parse_log_embed_description, but rebuilds the body from every page
+    (embed) on the message so multi-page logs round-trip through Edit.
+    Pages are concatenated as-is: _chunk_text puts break whitespace at the
+    start of the next page (kept by Discord) and never at the end of one
+    (trimmed), so joining with "" inverts the split exactly.
+    """
+    embeds = msg.embeds or []
+    if not embeds:
+        return 1, 1, "", "", ""
+
+    year, day, location, title, _ = _parse_log_embed_description(embeds[0].description or "")
+    body = "".join(_page_body(e.description or "") for e in embeds)
+    return year, day, location, title, body
+
+def _log_fields_from_result(result: Dict[str, Any]) -> Tuple[int, int, str, str, str]:
+    return result["year"], result["day"], result["location"], result["title"], result["body"]
+
+def _log_fields(msg: discord.Message) -> Tuple[int, int, str, str, str]:
+    """
+    (year, day, location, title, body) for a log: from _LOG_CONTENT when it was
+    written/edited recently, otherwise parsed back from the embed.
+    """
+    cached = _LOG_CONTENT.get(msg.id)
+    if cached is not None:
+        return cached
+    return _parse_log_message(msg)
+
 # =====================
 # PANEL DETECTION / MANAGEMENT
 # =====================
 
-def _is_panel_message(msg: discord.Message) -> bool:
-    if not msg.author.bot:
-        return False
-    if not msg.embeds:
-        return False
-    if (msg.embeds[0].title or "") != PANEL_TITLE:
+def _is_panel_message(msg: discord.Message, me_id: Optional[int] = None) -> bool:
+    """
+    A panel is one of OUR messages carrying the Write Log button.
+    Cheap author/components checks first; only then walk the button rows.
+    """
+    if me_id is not None:
+        if msg.author.id != me_id:
+            return False
+    elif not msg.author.bot:
         return False
     if not msg.components:
         return False
-    return True
+    return any(
+        getattr(c, "custom_id", None) == WRITE_BUTTON_CUSTOM_ID
+        for row in msg.components
+        for c in getattr(row, "children", ())
+    )
 
 async def _delete_old_panels(channel: discord.TextChannel):
     """
-    Deletes any prior panel messages (recent scan + cached ID).
+    Deletes any prior panel messages.
+    Fast path: delete the cached panel ID directly (one request, no fetch).
+    Only falls back to the recent-history scan when we have no cached ID
+    (e.g. after a restart) or the cached message is already gone.
     """
     cid = channel.id
-    cached_id = _LAST_PANEL_ID.get(cid)
+    cached_id = _LAST_PANEL_ID.pop(cid, None)
     if cached_id:
         try:
-            m = await channel.fetch_message(cached_id)
-            if _is_panel_message(m):
-                await m.delete()
+            # _LAST_PANEL_ID only ever holds IDs of panels we posted ourselves
+            await channel.get_partial_message(cached_id).delete()
+            return
         except Exception:
             pass
 
+    me = channel.guild.me
+    me_id = me.id if me is not None else None
     try:
-        async for m in channel.history(limit=PANEL_SCAN_LIMIT):
-            if _is_panel_message(m):
-                try:
-                    await m.delete()
-                except Exception:
-                    pass
+        found = [m async for m in channel.history(limit=PANEL_SCAN_LIMIT) if _is_panel_message(m, me_id)]
     except Exception:
-        pass
+        return
+    if not found:
+        return
+    # One bulk-delete request for all duplicates; bulk delete refuses messages
+    # older than 14 days (or missing Manage Messages), so fall back to singles
+    try:
+        await channel.delete_messages(found)
+    except (discord.HTTPException, discord.ClientException):
+        await asyncio.gather(*(m.delete() for m in found), return_exceptions=True)
 
 async def _post_panel(channel: discord.TextChannel) -> Optional[discord.Message]:
     """
     Posts a new panel at the bottom.
     """
     try:
-        view = WritePanelView()
-        emb = _build_panel_embed()
-        msg = await channel.send(embed=emb, view=view)
+        view = _write_panel_view()
+        msg = await channel.send(embed=_PANEL_EMBED, view=view)
         _LAST_PANEL_ID[channel.id] = msg.id
         return msg
     except Exception:
@@ -322,9 +650,13 @@ async def _post_panel(channel: discord.TextChannel) -> Optional[discord.Message]
 async def refresh_panel(channel: discord.TextChannel):
     """
     Deletes existing panel(s) and posts a fresh one at the bottom.
+    Serialised per channel so overlapping logs can't leave duplicate panels.
     """
-    await _delete_old_panels(channel)
-    await _post_panel(channel)
+    lock = _PANEL_LOCKS.setdefault(channel.id, asyncio.Lock())
+    async with lock:
+        await _delete_old_panels(channel)
+        await _post_panel(channel)
+        _save_state()
 
 # =====================
 # TEMP PERMISSIONS FOR IMAGE UPLOAD
@@ -351,9 +683,22 @@ async def _revoke_temp_send_messages(channel: discord.TextChannel, member: disco
 # UI: MODALS  ✅ LOCATION ADDED
 # =====================
 
+def _read_log_inputs(modal: discord.ui.Modal) -> Dict[str, Any]:
+    """
+    Shared by WriteLogModal / EditLogModal: read + normalise each input once.
+    """
+    loc = _sanitize_location(str(modal.location.value))
+    return {
+        "year": _parse_number_field(modal.year.value),
+        "day": _parse_number_field(modal.day.value),
+        "location": loc if loc else "Unknown",
+        "title": str(modal.entry_title.value).strip()[:256],
+        "body": str(modal.entry_body.value).rstrip(),
+    }
+
 class WriteLogModal(discord.ui.Modal, title="Write a Traveler Log"):
     def __init__(self, default_year: int, default_day: int):
-        super().__init__(timeout=300)
+        super().__init__(timeout=MODAL_TIMEOUT_SECONDS)
 
         self.year = discord.ui.TextInput(
             label="Year (number)",
@@ -393,32 +738,64 @@ class WriteLogModal(discord.ui.Modal, title="Write a Traveler Log"):
         self.add_item(self.entry_title)
         self.add_item(self.entry_body)
 
-        self.result: Optional[Dict[str, Any]] = None
-
     async def on_submit(self, interaction: discord.Interaction):
-        try:
-            y = int(str(self.year.value).strip())
-        except Exception:
-            y = 1
-        try:
-            d = int(str(self.day.value).strip())
-        except Exception:
-            d = 1
-
-        loc = _sanitize_location(str(self.location.value))
+        # Checked again here: the modal can outlive a channel move/config change
+        if not _is_log_channel(interaction.channel):
+            await interaction.response.send_message("❌ Traveler logs can't be written in this channel.", ephemeral=True)
+            return
 
-        self.result = {
-            "year": max(1, y),
-            "day": max(1, d),
-            "location": loc if loc else "Unknown",
-            "title": str(self.entry_title.value).strip()[:256],
-            "body": str(self.entry_body.value).rstrip(),
-        }
+        result = _read_log_inputs(self)
         await interaction.response.defer(ephemeral=True)
 
+        embeds = _build_log_embeds(
+            year=result["year"],
+            day=result["day"],
+            location=result["location"],
+            entry_title=result["title"],
+            body=result["body"],
+            author_name=_display_name(interaction.user),
+        )
+
+        # All pages go out in one message (buttons on it); overflow batches follow
+        batches = _batch_embeds(embeds)
+        first_msg = await interaction.channel.send(embeds=batches[0], view=_log_actions_view())
+        _set_log_owner(first_msg.id, interaction.user.id)
+        _LOG_CONTENT[first_msg.id] = _log_fields_from_result(result)
+
+        for batch in batches[1:]:
+            await interaction.channel.send(embeds=batch)
+
+        if isinstance(interaction.channel, discord.TextChannel):
+            await refresh_panel(interaction.channel)
+
+        try:
+            await interaction.followup.send("✅ Traveler log recorded.", ephemeral=True)
+        except Exception:
+            pass
+
 class EditLogModal(discord.ui.Modal, title="Edit Traveler Log"):
-    def __init__(self, *, default_year: int, default_day: int, default_location: str, default_title: str, default_body: str):
-        super().__init__(timeout=300)
+    def __init__(
+        self,
+        *,
+        message: discord.Message,
+        default_year: int,
+        default_day: int,
+        default_location: str,
+        default_title: str,
+        default_body: str,
+    ):
+        super().__init__(timeout=MODAL_TIMEOUT_SECONDS)
+
+        self.message = message
+        # Normalised like _read_log_inputs so an untouched submit compares equal
+        self.before = (
+            default_year,
+            default_day,
+            _sanitize_location(default_location) or "Unknown",
+            (default_title or "").strip()[:256],
+            # Same truncation as the Log input's default below
+            (default_body or "")[:4000].rstrip(),
+        )
 
         self.year = discord.ui.TextInput(
             label="Year (number)",
@@ -458,28 +835,45 @@ class EditLogModal(discord.ui.Modal, title="Edit Traveler Log"):
         self.add_item(self.entry_title)
         self.add_item(self.entry_body)
 
-        self.result: Optional[Dict[str, Any]] = None
-
     async def on_submit(self, interaction: discord.Interaction):
+        result = _read_log_inputs(self)
+        await interaction.response.defer(ephemeral=True)
+
+        # Submitted untouched: skip the edit (and the continuation re-post + panel refresh)
+        after = _log_fields_from_result(result)
+        if after == self.before:
+            await interaction.followup.send("✅ No changes.", ephemeral=True)
+            return
+
+        new_embeds = _build_log_embeds(
+            year=result["year"],
+            day=result["day"],
+            location=result["location"],
+            entry_title=result["title"],
+            body=result["body"],
+            author_name=_display_name(interaction.user),
+            # Read at submit time: an image may have been added while the modal was open
+            image_filename=_LOG_OWNERS.get(self.message.id, (0, None))[1],
+        )
+        batches = _batch_embeds(new_embeds)
+
+        # No view=: the buttons already on the message stay as they are
         try:
-            y = int(str(self.year.value).strip())
-        except Exception:
-            y = 1
-        try:
-            d = int(str(self.day.value).strip())
-        except Exception:
-            d = 1
+            await self.message.edit(embeds=batches[0])
+        except Exception as e:
+            await interaction.followup.send(f"❌ Edit failed: {e}", ephemeral=True)
+            return
 
-        loc = _sanitize_location(str(self.location.value))
+        _LOG_CONTENT[self.message.id] = _log_fields_from_result(result)
 
-        self.result = {
-            "year": max(1, y),
-            "day": max(1, d),
-            "location": loc if loc else "Unknown",
-            "title": str(self.entry_title.value).strip()[:256],
-            "body": str(self.entry_body.value).rstrip(),
-        }
-        await interaction.response.defer(ephemeral=True)
+        # Overflow batches (only if a log outgrows one message)
+        for batch in batches[1:]:
+            await interaction.channel.send(embeds=batch)
+
+        if isinstance(interaction.channel, discord.TextChannel):
+            await refresh_panel(interaction.channel)
+
+        await interaction.followup.send("✅ Updated.", ephemeral=True)
 
 # =====================
 # UI: VIEWS / BUTTONS (PERSISTENT)
@@ -489,72 +883,39 @@ class WritePanelView(discord.ui.View):
     def __init__(self):
         super().__init__(timeout=None)
 
-    @discord.ui.button(label="Write Log", style=discord.ButtonStyle.primary, emoji="🖋️", custom_id="travelerlogs:write")
+    @discord.ui.button(label="Write Log", style=discord.ButtonStyle.primary, emoji="🖋️", custom_id=WRITE_BUTTON_CUSTOM_ID)
     async def write_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
-        year, day = _get_current_day_year()
-        modal = WriteLogModal(default_year=year, default_day=day)
-        await interaction.response.send_modal(modal)
-        await modal.wait()
-
-        if not modal.result:
+        # Checked before the form opens so nobody types a log that can't be posted
+        if not _is_log_channel(interaction.channel):
+            await interaction.response.send_message("❌ Traveler logs can't be written in this channel.", ephemeral=True)
             return
 
-        author_name = _display_name(interaction.user)
-        chunks = _chunk_text(modal.result["body"])
-
-        first_msg: Optional[discord.Message] = None
-
-        for i, chunk in enumerate(chunks, start=1):
-            emb = _build_log_embed(
-                year=modal.result["year"],
-                day=modal.result["day"],
-                location=modal.result["location"],
-                entry_title=modal.result["title"],
-                body=chunk,
-                author_name=author_name,
-                image_filename=None,
-                page=i,
-                total_pages=len(chunks),
-            )
-
-            view = LogActionsView(author_id=interaction.user.id)
-            msg = await interaction.channel.send(embed=emb, view=view)
-
-            if first_msg is None:
-                first_msg = msg
-                _LOG_META[msg.id] = {"author_id": interaction.user.id, "image_filename": None}
-
-        if isinstance(interaction.channel, discord.TextChannel):
-            await refresh_panel(interaction.channel)
-
-        try:
-            await interaction.followup.send("✅ Traveler log recorded.", ephemeral=True)
-        except Exception:
-            pass
+        year, day = _get_current_day_year()
+        await interaction.response.send_modal(WriteLogModal(default_year=year, default_day=day))
 
 class LogActionsView(discord.ui.View):
-    def __init__(self, author_id: int):
+    # Stateless: the log is interaction.message, its author comes from _LOG_OWNERS
+    def __init__(self):
         super().__init__(timeout=None)
-        self.author_id = author_id
 
     @discord.ui.button(label="Edit Log", style=discord.ButtonStyle.secondary, emoji="✏️", custom_id="travelerlogs:edit")
     async def edit_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
         msg = interaction.message
-        meta = _LOG_META.get(msg.id)
+        owner = _LOG_OWNERS.get(msg.id)
 
-        if not meta or meta.get("author_id") != interaction.user.id:
+        if not owner or owner[0] != interaction.user.id:
             await interaction.response.send_message("❌ Only the log author can edit this.", ephemeral=True)
             return
 
         year, day, location, title, body = 1, 1, "Unknown", "", ""
 
         try:
-            emb = msg.embeds[0]
-            year, day, location, title, body = _parse_log_embed_description(emb.description or "")
+            year, day, location, title, body = _log_fields(msg)
         except Exception:
             pass
 
         modal = EditLogModal(
+            message=msg,
             default_year=year,
             default_day=day,
             default_location=location,
@@ -562,65 +923,17 @@ class LogActionsView(discord.ui.View):
             default_body=body,
         )
         await interaction.response.send_modal(modal)
-        await modal.wait()
-
-        if not modal.result:
-            return
-
-        image_filename = meta.get("image_filename") if meta else None
-
-        new_chunks = _chunk_text(modal.result["body"])
-        new_body = new_chunks[0] if new_chunks else ""
-
-        new_embed = _build_log_embed(
-            year=modal.result["year"],
-            day=modal.result["day"],
-            location=modal.result["location"],
-            entry_title=modal.result["title"],
-            body=new_body,
-            author_name=_display_name(interaction.user),
-            image_filename=image_filename,
-            page=1,
-            total_pages=max(1, len(new_chunks)),
-        )
-
-        try:
-            await msg.edit(embed=new_embed, view=LogActionsView(author_id=interaction.user.id))
-        except Exception as e:
-            await interaction.followup.send(f"❌ Edit failed: {e}", ephemeral=True)
-            return
-
-        # Continuations
-        if len(new_chunks) > 1:
-            for i, chunk in enumerate(new_chunks[1:], start=2):
-                cont = _build_log_embed(
-                    year=modal.result["year"],
-                    day=modal.result["day"],
-                    location=modal.result["location"],
-                    entry_title=modal.result["title"],
-                    body=chunk,
-                    author_name=_display_name(interaction.user),
-                    image_filename=None,
-                    page=i,
-                    total_pages=len(new_chunks),
-                )
-                await interaction.channel.send(embed=cont)
-
-        if isinstance(interaction.channel, discord.TextChannel):
-            await refresh_panel(interaction.channel)
-
-        await interaction.followup.send("✅ Updated.", ephemeral=True)
 
     @discord.ui.button(label="Add Image", style=discord.ButtonStyle.success, emoji="📸", custom_id="travelerlogs:addimg")
     async def add_img_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
         msg = interaction.message
-        meta = _LOG_META.get(msg.id)
+        owner = _LOG_OWNERS.get(msg.id)
 
-        if not meta or meta.get("author_id") != interaction.user.id:
+        if not owner or owner[0] != interaction.user.id:
             await interaction.response.send_message("❌ Only the log author can add an image.", ephemeral=True)
             return
 
-        if meta.get("image_filename"):
+        if owner[1]:
             await interaction.response.send_message("❌ This log already has an image.", ephemeral=True)
             return
 
@@ -630,49 +943,64 @@ class LogActionsView(discord.ui.View):
             await interaction.response.send_message("❌ This only works in server text channels.", ephemeral=True)
             return
 
-        granted = await _grant_temp_send_messages(ch, member)
-
-        await interaction.response.send_message(
-            f"📸 Upload **1 image** in this channel within **{TEMP_UPLOAD_SECONDS}s**.\n"
-            f"(I {'temporarily allowed' if granted else 'could not change permissions, but you can still try'} sending.)",
-            ephemeral=True,
-        )
-
-        def check(m: discord.Message) -> bool:
-            if m.author.id != interaction.user.id:
-                return False
-            if m.channel.id != interaction.channel_id:
-                return False
-            if not m.attachments:
-                return False
-            for a in m.attachments:
-                ctype = (a.content_type or "").lower()
-                if ctype.startswith("image/"):
-                    return True
-            return False
+        # One upload window per user per channel, otherwise a single upload
+        # would satisfy every open listener and attach to several logs.
+        # The on_message hook (enforce_travelerlog_lock) resolves the future, so
+        # unrelated messages cost one dict lookup instead of a wait_for check call.
+        upload_key = (ch.id, member.id)
+        if upload_key in _PENDING_UPLOADS:
+            await interaction.response.send_message("⏳ You already have an image upload open in this channel.", ephemeral=True)
+            return
+        upload_fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        _PENDING_UPLOADS[upload_key] = upload_fut
 
         upload_msg: Optional[discord.Message] = None
         try:
-            upload_msg = await interaction.client.wait_for("message", timeout=float(TEMP_UPLOAD_SECONDS), check=check)
-        except asyncio.TimeoutError:
-            pass
+            # Ack straight away: the permission overwrite below is a REST call and the
+            # upload window can run long, so don't hold the initial response open.
+            await interaction.response.defer(ephemeral=True, thinking=False)
+
+            granted = await _grant_temp_send_messages(ch, member)
+
+            await interaction.followup.send(
+                f"📸 Upload **1 image** in this channel within **{TEMP_UPLOAD_SECONDS}s**.\n"
+                f"(I {'temporarily allowed' if granted else 'could not change permissions, but you can still try'} sending.)",
+                ephemeral=True,
+            )
+
+            try:
+                upload_msg = await asyncio.wait_for(upload_fut, timeout=float(TEMP_UPLOAD_SECONDS))
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                await _revoke_temp_send_messages(ch, member)
         finally:
-            await _revoke_temp_send_messages(ch, member)
+            _PENDING_UPLOADS.pop(upload_key, None)
 
         if upload_msg is None:
             await interaction.followup.send("⌛ Timed out waiting for an image.", ephemeral=True)
             return
 
-        attachment: Optional[discord.Attachment] = None
-        for a in upload_msg.attachments:
-            if (a.content_type or "").lower().startswith("image/"):
-                attachment = a
-                break
+        attachment: Optional[discord.Attachment] = next(
+            (a for a in upload_msg.attachments if _is_image_attachment(a)), None
+        )
 
         if not attachment:
             await interaction.followup.send("❌ No image attachment found.", ephemeral=True)
             return
 
+        max_bytes = min(MAX_IMAGE_BYTES, ch.guild.filesize_limit)
+        if attachment.size > max_bytes:
+            # Don't leave the rejected upload sitting in the log channel
+            try:
+                await upload_msg.delete()
+            except Exception:
+                pass
+            await interaction.followup.send(
+                f"❌ Image is too large (max {max_bytes / (1024 * 1024):.0f} MB), upload removed.", ephemeral=True
+            )
+            return
+
         try:
             file = await attachment.to_file()
         except Exception as e:
@@ -682,10 +1010,9 @@ class LogActionsView(discord.ui.View):
         image_filename = file.filename
 
         try:
-            emb = msg.embeds[0]
-            year, day, location, title, body = _parse_log_embed_description(emb.description or "")
+            year, day, location, title, body = _log_fields(msg)
 
-            new_embed = _build_log_embed(
+            new_embeds = _build_log_embeds(
                 year=year,
                 day=day,
                 location=location or "Unknown",
@@ -693,14 +1020,12 @@ class LogActionsView(discord.ui.View):
                 body=body,
                 author_name=_display_name(interaction.user),
                 image_filename=image_filename,
-                page=1,
-                total_pages=1,
             )
 
-            await msg.edit(embed=new_embed, attachments=[file], view=LogActionsView(author_id=interaction.user.id))
+            # Content is unchanged, so any overflow batch messages stay as they are
+            await msg.edit(embeds=_batch_embeds(new_embeds)[0], attachments=[file])
 
-            meta["image_filename"] = image_filename
-            _LOG_META[msg.id] = meta
+            _set_log_owner(msg.id, owner[0], image_filename)
 
             try:
                 await upload_msg.delete()
@@ -714,17 +1039,46 @@ class LogActionsView(discord.ui.View):
         except Exception as e:
             await interaction.followup.send(f"❌ Failed to attach image: {e}", ephemeral=True)
 
+# =====================
+# SHARED VIEW INSTANCES
+# =====================
+# Both views are persistent (timeout=None, fixed custom_ids) and keep no
+# per-message state (ownership is checked against _LOG_OWNERS), so one instance
+# of each serves every message. Built lazily: View() needs a running loop.
+
+_WRITE_PANEL_VIEW: Optional[WritePanelView] = None
+_LOG_ACTIONS_VIEW: Optional[LogActionsView] = None
+
+def _write_panel_view() -> WritePanelView:
+    global _WRITE_PANEL_VIEW
+    if _WRITE_PANEL_VIEW is None:
+        _WRITE_PANEL_VIEW = WritePanelView()
+    return _WRITE_PANEL_VIEW
+
+def _log_actions_view() -> LogActionsView:
+    global _LOG_ACTIONS_VIEW
+    if _LOG_ACTIONS_VIEW is None:
+        _LOG_ACTIONS_VIEW = LogActionsView()
+    return _LOG_ACTIONS_VIEW
+
 # =====================
 # PUBLIC: REGISTER VIEWS (persistent)
 # =====================
 
+# on_ready fires again on reconnects; views only need registering once
+_VIEWS_REGISTERED = False
+
 def register_views(client: discord.Client):
     """
     Call in main.py on_ready:
       travelerlogs_module.register_views(client)
     """
-    client.add_view(WritePanelView())
-    client.add_view(LogActionsView(author_id=0))
+    global _VIEWS_REGISTERED
+    if _VIEWS_REGISTERED:
+        return
+    client.add_view(_write_panel_view())
+    client.add_view(_log_actions_view())
+    _VIEWS_REGISTERED = True
 
 # =====================
 # STARTUP ENSURE (CATEGORY-WIDE)
@@ -733,7 +1087,8 @@ def register_views(client: discord.Client):
 async def ensure_write_panels(client: discord.Client, guild_id: int):
     """
     Ensures a panel exists in EVERY text channel inside TRAVELERLOGS_CATEGORY_ID,
-    except excluded channels. Paces requests to avoid 429.
+    except excluded channels. Runs up to ENSURE_PANEL_CONCURRENCY channels at once
+    and paces each one to avoid 429.
     """
     await client.wait_until_ready()
     guild = client.get_guild(guild_id)
@@ -750,18 +1105,26 @@ async def ensure_write_panels(client: discord.Client, guild_id: int):
     if not isinstance(category, discord.CategoryChannel):
         return
 
-    for ch in category.channels:
-        if not isinstance(ch, discord.TextChannel):
-            continue
-        if ch.id in EXCLUDED_CHANNEL_IDS:
-            continue
+    channels = [
+        ch for ch in category.channels
+        if _is_log_channel(ch)
+    ]
+    if not channels:
+        return
 
-        try:
-            await refresh_panel(ch)
-        except Exception:
-            pass
+    # Each channel has its own message rate-limit bucket, so a few can run at once.
+    # Every worker still holds its slot for the pacing delay to stay clear of 429s.
+    sem = asyncio.Semaphore(max(1, ENSURE_PANEL_CONCURRENCY))
 
-        await asyncio.sleep(max(0.5, ENSURE_PANEL_DELAY_SECONDS))
+    async def _ensure_one(ch: discord.TextChannel):
+        async with sem:
+            try:
+                await refresh_panel(ch)
+            except Exception:
+                pass
+            await asyncio.sleep(max(0.5, ENSURE_PANEL_DELAY_SECONDS))
+
+    await asyncio.gather(*(_ensure_one(ch) for ch in channels), return_exceptions=True)
 
 # =====================
 # SLASH COMMANDS
@@ -780,40 +1143,56 @@ def setup_travelerlog_commands(tree: app_commands.CommandTree, guild_id: int, ad
         description="(Admin) Post the 'Write Log' panel in this channel",
         guild=guild_obj,
     )
+    @app_commands.checks.has_role(int(admin_role_id))
     async def postlogbutton(interaction: discord.Interaction):
-        ok = False
-        try:
-            if isinstance(interaction.user, discord.Member):
-                ok = any(r.id == int(admin_role_id) for r in interaction.user.roles)
-        except Exception:
-            ok = False
-
-        if not ok:
-            await interaction.response.send_message("❌ Admin only.", ephemeral=True)
-            return
-
         ch = interaction.channel
-        if not isinstance(ch, discord.TextChannel):
-            await interaction.response.send_message("❌ Use this in a server text channel.", ephemeral=True)
+        if not _is_log_channel(ch):
+            await interaction.response.send_message(
+                "❌ Use this in a traveler log channel (not excluded, inside the traveler logs category).",
+                ephemeral=True,
+            )
             return
 
         await interaction.response.defer(ephemeral=True)
         await refresh_panel(ch)
         await interaction.followup.send("✅ Panel posted (and any old panel removed).", ephemeral=True)
 
+    # Scoped to this command so other modules' command errors are untouched
+    @postlogbutton.error
+    async def postlogbutton_error(interaction: discord.Interaction, error: app_commands.AppCommandError):
+        if isinstance(error, (app_commands.MissingRole, app_commands.NoPrivateMessage)):
+            await interaction.response.send_message("❌ Admin only.", ephemeral=True)
+            return
+        # Don't re-raise: the tree would call this handler again, then drop it unretrieved
+        print(f"[travelerlogs] postlogbutton error: {error}")
+
     @tree.command(
         name="writelog",
         description="Write a traveler log (opens a form)",
         guild=guild_obj,
     )
     async def writelog(interaction: discord.Interaction):
+        if not _is_log_channel(interaction.channel):
+            await interaction.response.send_message("❌ Traveler logs can't be written in this channel.", ephemeral=True)
+            return
+
         year, day = _get_current_day_year()
         modal = WriteLogModal(default_year=year, default_day=day)
         await interaction.response.send_modal(modal)
 
 # =====================
-# NO LOCK ENFORCEMENT (Discord perms handle this)
+# ON_MESSAGE HOOK (no lock enforcement - Discord perms handle that)
 # =====================
 
 async def enforce_travelerlog_lock(message: discord.Message):
-    return
\ No newline at end of file
+    """
+    Call from main.py on_message.
+    Hands an image upload to the Add Image window waiting on (channel, author).
+    """
+    if not message.attachments:
+        return
+    fut = _PENDING_UPLOADS.get((message.channel.id, message.author.id))
+    if fut is None or fut.done():
+        return
+    if any(_is_image_attachment(a) for a in message.attachments):
+        fut.set_result(message)
\ No newline at end of file